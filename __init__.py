@@ -15,18 +15,27 @@ NODE_DISPLAY_NAME_MAPPINGS = {
     "MaxShiftSlider": "Max Shift Slider",
     "ControlNetSlider": "ControlNet Slider",
     "CannySlider": "CannySlider",
+    "ParameterSweep": "Parameter Sweep",
     "SelectFromBatch": "Select From Batch",
     "LatentPass": "LatentPass",
     "SEGSPass": "SEGSPass",
     "PipePass": "PipePass",
     "IntPass": "IntPass",
     "TextVersions": "Text Versions",
+    "CachedTextEncode": "Cached Text Encode",
+    "DynamicPromptExpander": "Dynamic Prompt Expander",
+    "ReduxReferenceConditioning": "Redux Reference Conditioning",
+    "BatchedCanny": "Batched Canny",
     "ResolutionPicker": "Resolution Picker",
     "ResolutionMultiplySlider": "ResolutionMultiplySlider",
+    "UpscaleTilePlanner": "Upscale Tile Planner",
+    "ShardedUpscale": "Sharded Upscale",
     "SamplerParameterPacker": "Sampler Parameter Packer",
     "SamplerParameterUnpacker": "Sampler Parameter Unpacker",
+    "FluxSigmaSchedule": "Flux Sigma Schedule",
     "ImpactControlBridgeFix": "ImpactControlBridgeFix",
     "BooleanToEnabled": "Boolean To Enabled",
+    "RemoteDispatch": "Remote Dispatch",
     "OutputGetString": "OutputGetString",
     "SplitVec2": "SplitVec2",
     "SplitVec3": "SplitVec3",
@@ -34,6 +43,7 @@ NODE_DISPLAY_NAME_MAPPINGS = {
     "FluxContinuumModelRouter": "Flux Continuum Model Router",
     "ConfigurableModelRouter": "Configurable Model Router",
     "ImageBatchBoolean": "Image Batch Boolean",
+    "BatchSelect": "Batch Select",
     "DrawTextConfig": "DrawTextConfig",
     "ConfigurableDrawText": "ConfigurableDrawText"
 }
@@ -0,0 +1,100 @@
+"""Batched Canny against a per-image OpenCV loop.
+
+Builds a synthetic batch (shapes plus noise), checks edge agreement with
+cv2.Canny and times the torch path, the BatchedCanny node cold, warm and with
+new thresholds, and OpenCV with and without the tensor conversion a node needs.
+Needs opencv-python on top of the node's own dependencies.
+
+    python benchmarks/bench_canny.py --batch 8 --size 1024
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), "tests"))
+
+import cv2  # noqa: E402
+import numpy as np  # noqa: E402
+import torch  # noqa: E402
+
+from comfy_stubs import load_misc  # noqa: E402
+
+
+def synthetic_batch(batch, size):
+    torch.manual_seed(0)
+    yy, xx = torch.meshgrid(torch.arange(size), torch.arange(size), indexing="ij")
+    images = []
+    for b in range(batch):
+        image = torch.zeros(size, size, 3)
+        cx, cy, r = size * 0.3 + 20 * b, size * 0.4, size * 0.15 + 10 * b
+        image[((xx - cx) ** 2 + (yy - cy) ** 2) < r * r] = 0.8
+        image[size // 5:size * 7 // 10, size * 6 // 10 + b * 10:size * 9 // 10] = torch.tensor([0.2, 0.6, 0.9])
+        image += torch.randn(size, size, 3) * 0.02
+        images.append(image.clamp(0, 1))
+    return torch.stack(images)
+
+
+def opencv_canny(frame, low, high):
+    # Same blur as canny_magnitude; the node's thresholds are on the 1/8-normalized Sobel of 0-1 images
+    gray = cv2.GaussianBlur(cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY), (5, 5), 1.0)
+    return cv2.Canny(gray, low * 255 * 8, high * 255 * 8, L2gradient=True)
+
+
+def timed(fn, repeat):
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch", type=int, default=8)
+    parser.add_argument("--size", type=int, default=1024)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    misc = load_misc()
+    images = synthetic_batch(args.batch, args.size)
+    frames = (images.numpy() * 255).astype(np.uint8)
+    low, high = 0.4, 0.8
+
+    edges = misc.canny_edges(images[:1], 0.1, 0.2)[0].numpy()
+    reference = opencv_canny(frames[0], 0.1, 0.2) > 0
+    print(f"IoU with cv2.Canny: {(reference & edges).sum() / (reference | edges).sum():.3f}")
+    print(f"torch threads: {torch.get_num_threads()}, batch: {args.batch}x{args.size}px")
+
+    def opencv_node():
+        batch = (images.numpy() * 255).astype(np.uint8)
+        stacked = np.stack([opencv_canny(frame, low, high) for frame in batch])
+        return torch.from_numpy(stacked).float() / 255
+
+    node = misc.BatchedCanny()
+
+    def clear_caches():
+        misc.canny_cache.resize(0)
+        misc.canny_magnitude_cache.resize(0)
+
+    results = {
+        "cv2 loop": timed(lambda: [opencv_canny(frame, low, high) for frame in frames], args.repeat),
+        "cv2 loop incl. tensor conversion": timed(opencv_node, args.repeat),
+        "torch canny_edges": timed(lambda: misc.canny_edges(images, low, high), args.repeat),
+        "node uncached": timed(lambda: node.detect(images, (low, high), "cpu", 0), args.repeat),
+    }
+
+    clear_caches()
+    node.detect(images, (low, high), "cpu", 256)
+    results["node cache hit"] = timed(lambda: node.detect(images, (low, high), "cpu", 256), args.repeat)
+    misc.canny_cache.resize(0)
+    start = time.perf_counter()
+    node.detect(images, (0.3, 0.7), "cpu", 256)
+    results["node new thresholds"] = (time.perf_counter() - start) * 1000
+
+    for label, elapsed in results.items():
+        print(f"{label}: {elapsed:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
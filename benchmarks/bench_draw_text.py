@@ -0,0 +1,70 @@
+"""Per-megapixel microbenchmark for ConfigurableDrawText.
+
+Times one caption drawn onto single frames of increasing size and reports ms per
+frame and ms per megapixel. Pass --baseline <git rev> to time that revision's
+misc.py side by side (revisions before the NumPy bridge also need torchvision).
+
+    python benchmarks/bench_draw_text.py --baseline 310de25
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), "tests"))
+
+import torch  # noqa: E402
+
+from comfy_stubs import REPO_DIR, load_misc  # noqa: E402
+
+
+def load_revision(rev):
+    source = subprocess.check_output(["git", "-C", REPO_DIR, "show", f"{rev}:misc.py"])
+    with tempfile.NamedTemporaryFile("wb", suffix=".py", delete=False) as handle:
+        handle.write(source)
+    try:
+        return load_misc(handle.name, name=f"flux_continuum_misc_{rev}")
+    finally:
+        os.unlink(handle.name)
+
+
+def draw_once(module, node, style, image):
+    # ConfigurableDrawText takes list inputs since it became INPUT_IS_LIST
+    if getattr(node, "INPUT_IS_LIST", False):
+        return node.draw(["caption"], [style], [image])[0][0]
+    return node.draw("caption", style, image)[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--baseline", help="git revision whose misc.py is timed for comparison")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1024, 2048, 4096])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    modules = [("current", load_misc())]
+    if args.baseline:
+        baseline = load_revision(args.baseline)
+        baseline.FONTS_DIR = modules[0][1].FONTS_DIR
+        modules.insert(0, (args.baseline, baseline))
+
+    for side in args.sizes:
+        image = torch.rand(1, side, side, 3)
+        megapixels = side * side / 1e6
+        for label, module in modules:
+            style = module.DrawTextConfig().configure(
+                "Inter_24pt-Medium.ttf", 56, "#FFFFFF", "#00000080", 20, 4, 4, "#000000", "center", "bottom", 0, 0, "ltr"
+            )[0]
+            node = module.ConfigurableDrawText()
+            draw_once(module, node, style, image)
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                draw_once(module, node, style, image)
+            elapsed = (time.perf_counter() - start) / args.repeat * 1000
+            print(f"{side}px {label}: {elapsed:.1f} ms/frame, {elapsed / megapixels:.2f} ms/MP")
+
+
+if __name__ == "__main__":
+    main()
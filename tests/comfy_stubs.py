@@ -0,0 +1,63 @@
+"""Stand-ins for the modules ComfyUI provides, so misc.py can be imported by the tests and benchmarks"""
+import importlib.util
+import os
+import sys
+import types
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+
+
+class _Routes:
+    def get(self, path):
+        return lambda handler: handler
+
+    def post(self, path):
+        return lambda handler: handler
+
+
+class _PromptServer:
+    def __init__(self):
+        self.routes = _Routes()
+        self.client_id = "client"
+        self.last_prompt_id = "prompt"
+        self.sent = []
+
+    def send_sync(self, event, data, sid=None):
+        self.sent.append((event, data, sid))
+
+
+class ExecutionBlocker:
+    def __init__(self, message):
+        self.message = message
+
+
+def _stub(name, **attributes):
+    module = types.ModuleType(name)
+    module.__dict__.update(attributes)
+    sys.modules.setdefault(name, module)
+    return sys.modules[name]
+
+
+def install_comfy_stubs():
+    _stub("nodes", interrupt_processing=lambda value=True: None)
+    server = _stub("server")
+    if not hasattr(server, "PromptServer"):
+        server.PromptServer = type("PromptServer", (), {"instance": _PromptServer()})
+    _stub("folder_paths")
+    comfy = _stub("comfy")
+    comfy.__path__ = []
+    for name in ("samplers", "utils", "model_sampling", "model_management"):
+        setattr(comfy, name, _stub(f"comfy.{name}"))
+    if not hasattr(comfy.samplers, "KSampler"):
+        comfy.samplers.KSampler = type("KSampler", (), {"SAMPLERS": ["euler"], "SCHEDULERS": ["normal"]})
+    comfy_execution = _stub("comfy_execution")
+    comfy_execution.__path__ = []
+    comfy_execution.graph = _stub("comfy_execution.graph", ExecutionBlocker=ExecutionBlocker)
+
+
+def load_misc(path=os.path.join(REPO_DIR, "misc.py"), name="flux_continuum_misc"):
+    install_comfy_stubs()
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
@@ -0,0 +1,26 @@
+"""Loads misc.py outside ComfyUI by standing in for the modules ComfyUI provides"""
+import importlib.util
+
+import pytest
+
+from comfy_stubs import install_comfy_stubs, load_misc
+
+# Third-party packages misc.py imports at module level; ComfyUI itself provides them
+REQUIRED = ("aiohttp", "numpy", "PIL", "torch")
+MISSING = [name for name in REQUIRED if importlib.util.find_spec(name) is None]
+
+# Installed on import: pytest imports the node package's __init__ (and with it misc.py) before any fixture runs
+install_comfy_stubs()
+
+
+def pytest_collection_modifyitems(config, items):
+    # Skip marks are evaluated before the package __init__ is set up, so nothing tries to import misc.py
+    if MISSING:
+        skip = pytest.mark.skip(reason=f"needs {', '.join(MISSING)}")
+        for item in items:
+            item.add_marker(skip)
+
+
+@pytest.fixture(scope="session")
+def misc():
+    return load_misc()
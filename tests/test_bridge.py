@@ -0,0 +1,125 @@
+import math
+import sys
+
+import pytest
+
+
+def workflow(bridge_mode_targets):
+    """Bridge node 1 feeding node 2 (and node 3), with the given UI modes"""
+    nodes = [{"id": 1, "mode": 0, "outputs": [{"links": [10, 11]}]}]
+    for node_id, mode in bridge_mode_targets.items():
+        nodes.append({"id": node_id, "mode": mode, "outputs": []})
+    links = [[10, 1, 0, 2, 0, "*"], [11, 1, 0, 3, 0, "*"]]
+    return {"nodes": nodes, "links": links}
+
+
+class PromptQueue:
+    def __init__(self):
+        self.currently_running = {}
+
+
+@pytest.fixture(autouse=True)
+def reset_bridges(misc, monkeypatch):
+    misc._blocked_bridges.clear()
+    misc.PromptServer.instance.sent.clear()
+    monkeypatch.setattr(misc.PromptServer.instance, "prompt_queue", PromptQueue(), raising=False)
+
+
+def run(misc, ui_workflow):
+    """Makes ui_workflow the workflow of the prompt ComfyUI is executing, as the queue holds it"""
+    extra_data = {"extra_pnginfo": {"workflow": ui_workflow}} if ui_workflow is not None else {}
+    misc.PromptServer.instance.prompt_queue.currently_running = {0: (0, "prompt", {}, extra_data, ["1"])}
+    return extra_data.get("extra_pnginfo")
+
+
+def is_changed(misc, **widgets):
+    # How ComfyUI calls it: linked inputs (value) absent, no EXTRA_PNGINFO and an empty PROMPT
+    return misc.ImpactControlBridgeFix.IS_CHANGED(unique_id="1", prompt={}, **widgets)
+
+
+def test_fingerprint_is_stable_for_unchanged_inputs(misc):
+    assert misc.bridge_fingerprint(3, True, "Mute", ("2", "3")) == misc.bridge_fingerprint(3, True, "Mute", ("3", "2"))
+
+
+@pytest.mark.parametrize("changed", [
+    (4, True, "Mute", ("2", "3")),
+    (3, False, "Mute", ("2", "3")),
+    (3, True, "Bypass", ("2", "3")),
+    (3, True, "Mute", ("2",)),
+])
+def test_fingerprint_changes_with_what_affects_the_bridge(misc, changed):
+    assert misc.bridge_fingerprint(*changed) != misc.bridge_fingerprint(3, True, "Mute", ("2", "3"))
+
+
+def test_unchanged_rerun_keeps_the_cache_behind_the_bridge(misc):
+    # ComfyUI re-executes a node (and everything after it) only when IS_CHANGED differs from the last run
+    run(misc, workflow({2: 0, 3: 0}))
+    first = is_changed(misc, mode=True, behavior="Mute")
+    run(misc, workflow({2: 0, 3: 0}))
+    assert is_changed(misc, mode=True, behavior="Mute") == first
+    assert not (isinstance(first, float) and math.isnan(first))
+
+
+def test_rewired_bridge_is_re_executed(misc):
+    run(misc, workflow({2: 0, 3: 0}))
+    first = is_changed(misc, mode=True, behavior="Mute")
+    rewired = workflow({2: 0, 3: 0})
+    rewired["links"].pop()
+    rewired["nodes"][0]["outputs"][0]["links"] = [10]
+    run(misc, rewired)
+    assert is_changed(misc, mode=True, behavior="Mute") != first
+
+
+def test_manual_mode_change_re_executes_the_bridge(misc):
+    run(misc, workflow({2: 2, 3: 2}))
+    muted = is_changed(misc, mode=False, behavior="Mute")
+    # The user un-mutes a node the bridge keeps muted
+    run(misc, workflow({2: 0, 3: 2}))
+    assert is_changed(misc, mode=False, behavior="Mute") != muted
+
+
+def test_bridge_is_re_executed_when_the_workflow_is_not_visible(misc):
+    misc.PromptServer.instance.prompt_queue.currently_running = {}
+    assert math.isnan(is_changed(misc, mode=True, behavior="Mute"))
+    # Stop doesn't depend on the workflow
+    assert is_changed(misc, mode=True, behavior="Stop") == is_changed(misc, mode=True, behavior="Stop")
+
+
+def test_prompt_without_workflow_stays_cacheable(misc):
+    # doit passes the value straight through without a workflow, so nothing can change behind it
+    run(misc, None)
+    first = is_changed(misc, mode=False, behavior="Bypass")
+    assert first == is_changed(misc, mode=False, behavior="Bypass")
+    assert not (isinstance(first, float) and math.isnan(first))
+
+
+def test_resolve_bridge_lists_only_nodes_that_change(misc):
+    index = misc.WorkflowIndex(workflow({2: 0, 3: 2}))
+    assert misc.resolve_bridge(index, "1", True, "Mute") == {"actives": ["3"]}
+    assert misc.resolve_bridge(index, "1", False, "Mute") == {"mutes": ["2"]}
+    assert misc.resolve_bridge(index, "1", False, "Bypass") == {"bypasses": ["2", "3"]}
+    assert misc.resolve_bridge(misc.WorkflowIndex(workflow({2: 0, 3: 0})), "1", True, "Mute") == {}
+
+
+def test_blocked_bridge_is_re_executed_once(misc):
+    pnginfo = run(misc, workflow({2: 0, 3: 0}))
+    result = misc.ImpactControlBridgeFix().doit("value", False, "Mute", unique_id="1", extra_pnginfo=pnginfo)
+
+    assert isinstance(result[0], sys.modules["comfy_execution.graph"].ExecutionBlocker)
+    assert misc.PromptServer.instance.sent == [
+        ("flux-continuum-bridge-resolve", {"node_id": "1", "prompt_id": "prompt", "mutes": ["2", "3"]}, "client"),
+    ]
+    assert "1" in misc._blocked_bridges
+
+    # The requeued run must not be served the cached blocker...
+    assert math.isnan(is_changed(misc, mode=False, behavior="Mute"))
+    # ...but after that the bridge is cacheable again
+    run(misc, workflow({2: 2, 3: 2}))
+    assert is_changed(misc, mode=False, behavior="Mute") == is_changed(misc, mode=False, behavior="Mute")
+
+
+def test_bridge_without_changes_passes_the_value(misc):
+    pnginfo = run(misc, workflow({2: 0, 3: 0}))
+    assert misc.ImpactControlBridgeFix().doit("value", True, "Mute", unique_id="1", extra_pnginfo=pnginfo) == ("value",)
+    assert misc.PromptServer.instance.sent == []
+    assert not misc._blocked_bridges
@@ -0,0 +1,40 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+
+
+def serpentine(size=128, pitch=4):
+    """Squared magnitudes of one weak edge chain snaking across the image, strong only at its start"""
+    magnitude = torch.zeros(size, size)
+    for row in range(0, size, pitch):
+        magnitude[row, :] = 1.0
+        column = size - 1 if (row // pitch) % 2 == 0 else 0
+        magnitude[row:row + pitch, column] = 1.0
+    magnitude *= (8 * 0.5) ** 2
+    magnitude[0, 0] = (8 * 0.9) ** 2
+    return magnitude
+
+
+def test_hysteresis_follows_chains_longer_than_any_step_limit(misc):
+    chain = serpentine()
+    weak = chain > (8 * 0.4) ** 2
+    # Longer than the old 512-step cap
+    assert weak.sum() > 2048
+    edges = misc.canny_hysteresis(torch.stack([chain, chain * (chain < 40)]), 0.4, 0.8)
+    assert torch.equal(edges[0], weak)
+    # Images of a batch don't seed each other
+    assert not edges[1].any()
+
+
+def test_labelling_and_dilation_paths_agree(misc, monkeypatch):
+    pytest.importorskip("scipy")
+    torch.manual_seed(0)
+    magnitude = torch.rand(3, 96, 96) * 60
+    labelled = misc.canny_hysteresis(magnitude, 0.5, 0.8)
+
+    def unavailable(weak, seeds):
+        raise ImportError("scipy")
+    monkeypatch.setattr(misc, "label_hysteresis", unavailable)
+    assert torch.equal(misc.canny_hysteresis(magnitude, 0.5, 0.8), labelled)
+    chain = serpentine().unsqueeze(0)
+    assert torch.equal(misc.canny_hysteresis(chain, 0.4, 0.8), chain > (8 * 0.4) ** 2)
@@ -0,0 +1,130 @@
+import asyncio
+import socket
+import threading
+import time
+
+import pytest
+
+aiohttp = pytest.importorskip("aiohttp")
+from aiohttp import web  # noqa: E402
+
+
+class Worker:
+    """Stand-in ComfyUI server: GET /prompt reports its queue, POST /prompt accepts a prompt"""
+    def __init__(self, loop, queue_remaining=0, delay=0.0):
+        self.loop = loop
+        self.queue_remaining = queue_remaining
+        self.delay = delay
+        self.received = []
+        app = web.Application()
+        app.router.add_get("/prompt", self.get_prompt)
+        app.router.add_post("/prompt", self.post_prompt)
+        self.runner = web.AppRunner(app)
+        asyncio.run_coroutine_threadsafe(self.start(), loop).result(5)
+
+    async def start(self):
+        await self.runner.setup()
+        await web.TCPSite(self.runner, "127.0.0.1", 0).start()
+        self.url = f"http://127.0.0.1:{self.runner.addresses[0][1]}"
+
+    async def get_prompt(self, request):
+        return web.json_response({"exec_info": {"queue_remaining": self.queue_remaining + len(self.received)}})
+
+    async def post_prompt(self, request):
+        await asyncio.sleep(self.delay)
+        self.received.append(await request.json())
+        return web.json_response({"prompt_id": f"p{len(self.received)}"})
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self.runner.cleanup(), self.loop).result(5)
+
+
+@pytest.fixture
+def server_loop():
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield loop
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(5)
+    loop.close()
+
+
+@pytest.fixture
+def live(server_loop):
+    worker = Worker(server_loop, queue_remaining=2)
+    yield worker
+    worker.stop()
+
+
+@pytest.fixture
+def dead():
+    # A port nothing listens on
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return f"http://127.0.0.1:{sock.getsockname()[1]}"
+
+
+@pytest.fixture
+def dispatcher(misc, live, dead):
+    dispatcher = misc.RemoteDispatcher([dead, live.url], retries=1, timeout=5)
+    yield dispatcher
+    dispatcher.close().result(5)
+
+
+def test_unreachable_worker_ranks_below_a_busy_live_one(dispatcher, live):
+    jobs = [dispatcher.submit({"n": i}) for i in range(3)]
+    assert [future.result(5) for _, future in jobs] == [(live.url, "p1"), (live.url, "p2"), (live.url, "p3")]
+
+    stats = dispatcher.stats()
+    assert all(stats["jobs"][job_id]["attempts"] == 1 for job_id, _ in jobs)
+    assert stats["workers"][live.url]["in_flight"] == 0
+
+
+def test_job_is_retried_on_the_next_worker(dispatcher, live, dead):
+    # Pretend the dead worker reported an empty queue just now, so it is picked first
+    dispatcher.load_ttl = 60
+    dispatcher.remote_queue[dead] = (0, time.monotonic())
+    job_id, future = dispatcher.submit({"n": 0})
+
+    assert future.result(5) == (live.url, "p1")
+    stats = dispatcher.stats()
+    assert stats["jobs"][job_id]["state"] == "queued"
+    assert stats["jobs"][job_id]["attempts"] == 2
+    assert stats["workers"][dead]["failures"] == 1
+
+
+def test_unexpected_errors_mark_the_job_failed(dispatcher):
+    async def broken_session():
+        raise RuntimeError("Session is closed")
+    dispatcher._session = broken_session
+    job_id, future = dispatcher.submit({"n": 0})
+
+    with pytest.raises(RuntimeError):
+        future.result(5)
+    job = dispatcher.stats()["jobs"][job_id]
+    assert job["state"] == "failed"
+    assert job["errors"] == ["RuntimeError: Session is closed"]
+
+
+def test_replaced_dispatcher_finishes_its_jobs(misc, server_loop, live):
+    slow = Worker(server_loop, delay=0.3)
+    try:
+        misc._remote_dispatcher = None
+        old = misc.get_remote_dispatcher([slow.url], retries=0)
+        job_id, future = old.submit({"n": 0})
+
+        start = time.perf_counter()
+        new = misc.get_remote_dispatcher([live.url], retries=0)
+        # Replacing doesn't wait for the old dispatcher's jobs...
+        assert time.perf_counter() - start < 0.2
+        assert new is not old
+        # ...which still complete before its connections close
+        assert future.result(5) == (slow.url, "p1")
+        assert old.stats()["jobs"][job_id]["state"] == "queued"
+        with pytest.raises(RuntimeError):
+            old.submit({"n": 1})
+        new.close().result(5)
+    finally:
+        misc._remote_dispatcher = None
+        slow.stop()
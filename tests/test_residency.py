@@ -0,0 +1,125 @@
+import threading
+
+import pytest
+
+torch = pytest.importorskip("torch")
+
+
+def linear(features=64):
+    """Stand-in for a routed model: 64x64 float32 weights plus bias, 16.6 kB"""
+    return torch.nn.Linear(features, features)
+
+
+def manager(misc, models, max_models=8):
+    residency = misc.ModelResidencyManager(max_models=max_models, device="cpu")
+    residency.configure(models * misc.model_bytes(linear()))
+    return residency
+
+
+def test_models_stay_resident_within_the_budget(misc):
+    residency = manager(misc, models=2)
+    a, b = linear(), linear()
+    residency.acquire("a", a)
+    residency.acquire("b", b)
+
+    assert residency.get("a") is a
+    stats = residency.stats()
+    assert stats["resident"] == ["b", "a"]
+    assert (stats["loads"], stats["evictions"], stats["hits"]) == (2, 0, 1)
+
+
+def test_least_recently_used_model_is_offloaded_not_dropped(misc):
+    residency = manager(misc, models=2)
+    models = {key: linear() for key in "abc"}
+    for key in "abac":
+        residency.acquire(key, models[key])
+
+    stats = residency.stats()
+    # b was used least recently, so it alone leaves the device, but it is still held
+    assert stats["resident"] == ["a", "c"]
+    assert stats["held"] == 3
+    assert stats["evictions"] == 1
+    assert residency.get("b") is models["b"]
+    assert residency.stats()["resident"] == ["c", "b"]
+
+
+def test_max_models_drops_the_oldest(misc):
+    residency = manager(misc, models=1, max_models=2)
+    for key in "abc":
+        residency.acquire(key, linear())
+
+    assert not residency.contains("a")
+    assert residency.contains("b") and residency.contains("c")
+    assert residency.get("a") is None
+    assert residency.stats()["misses"] == 1
+
+
+def test_acquire_waits_for_a_prefetch_of_the_same_model(misc, monkeypatch):
+    residency = manager(misc, models=1)
+    a, b = linear(), linear()
+    # With room for one model, using b offloads a, which history makes the predicted next model
+    residency.acquire("a", a)
+    residency.acquire("a", a)
+    residency.acquire("b", b)
+    assert residency.stats()["resident"] == ["b"]
+
+    moving, release = threading.Event(), threading.Event()
+    move_model = misc.move_model
+
+    def slow_move(model, device, offload):
+        if model is a and not offload:
+            moving.set()
+            release.wait(5)
+        move_model(model, device, offload)
+    monkeypatch.setattr(misc, "move_model", slow_move)
+
+    # Once there is room for both, the next use of b prefetches a in the background
+    residency.configure(2 * misc.model_bytes(a), prefetch=True)
+    residency.acquire("b", b)
+    assert moving.wait(5), "a was not prefetched"
+    assert "a" in residency.prefetching
+
+    result = {}
+    waiter = threading.Thread(target=lambda: result.setdefault("model", residency.get("a")))
+    waiter.start()
+    waiter.join(0.2)
+    # get() hands over to the running prefetch rather than moving the model a second time
+    assert waiter.is_alive()
+    release.set()
+    waiter.join(5)
+
+    assert result["model"] is a
+    stats = residency.stats()
+    assert stats["resident"] == ["b", "a"]
+    assert not residency.prefetching
+
+
+def test_routers_missing_from_the_prompt_are_released(misc):
+    misc._model_residencies.clear()
+    kept = misc.router_residency("ConfigurableModelRouter", "4")
+    gone = misc.router_residency("ConfigurableModelRouter", "9")
+    gone.configure(1024 ** 2)
+    gone.acquire("a", linear())
+
+    misc.prune_residencies({"4": {"class_type": "ConfigurableModelRouter", "inputs": {}}})
+
+    assert misc.router_residency("ConfigurableModelRouter", "4") is kept
+    assert not gone.contains("a")
+    assert ("ConfigurableModelRouter", "9") not in misc._model_residencies
+
+
+def test_unloading_all_models_releases_held_models(misc, monkeypatch):
+    model_management = pytest.importorskip("comfy.model_management")
+    calls = []
+    monkeypatch.setattr(model_management, "unload_all_models", lambda: calls.append(True), raising=False)
+    misc.hook_model_unloads()
+    misc.hook_model_unloads()
+
+    misc._model_residencies.clear()
+    residency = misc.router_residency("FluxContinuumModelRouter", "1")
+    residency.configure(1024 ** 2)
+    residency.acquire("a", linear())
+
+    model_management.unload_all_models()
+    assert calls == [True]
+    assert not residency.contains("a")
@@ -0,0 +1,61 @@
+import threading
+import time
+
+import pytest
+
+torch = pytest.importorskip("torch")
+
+
+def upscale(shard, device):
+    """Stand-in for an upscale model: 2x nearest upscale, slower for even shards so they finish out of order"""
+    time.sleep(0.02 if int(shard[0, 0, 0, 0] * 100) % 2 == 0 else 0.0)
+    return torch.nn.functional.interpolate(shard.movedim(-1, 1).to(device), scale_factor=2).movedim(1, -1)
+
+
+def batch(size=9):
+    images = torch.rand(size, 8, 8, 3)
+    # Tag each image so the stand-in can tell them apart
+    images[:, 0, 0, 0] = torch.arange(size) / 100
+    return images
+
+
+@pytest.mark.parametrize("shard_size", [1, 2, 4])
+def test_sharded_output_matches_the_sequential_path_in_order(misc, shard_size):
+    images = batch()
+    output, timings = misc.run_sharded(images, upscale, workers=3, shard_size=shard_size, queue_depth=2, mode="cpu threads")
+
+    assert torch.equal(output, upscale(images, torch.device("cpu")))
+    shards = [(start, min(start + shard_size, 9)) for start in range(0, 9, shard_size)]
+    assert [tuple(timing["shard"]) for timing in timings] == shards
+    assert all(timing["device"] == "cpu" and timing["seconds"] >= 0 and timing["start_s"] >= 0 for timing in timings)
+    assert len({timing["worker"] for timing in timings}) > 1
+
+
+def test_on_shard_runs_on_the_calling_thread(misc):
+    calls = []
+    caller = threading.current_thread()
+    misc.run_sharded(batch(), upscale, workers=3, shard_size=2, mode="cpu threads",
+                     on_shard=lambda start, end: calls.append((start, end, threading.current_thread() is caller)))
+
+    assert sorted(calls) == [(0, 2, True), (2, 4, True), (4, 6, True), (6, 8, True), (8, 9, True)]
+
+
+def test_interrupt_stops_queued_shards(misc):
+    class Interrupted(Exception):
+        pass
+
+    ran = []
+    def slow(shard, device):
+        ran.append(shard.shape[0])
+        time.sleep(0.05)
+        return shard
+
+    def check_interrupt():
+        if ran:
+            raise Interrupted()
+
+    with pytest.raises(Interrupted):
+        misc.run_sharded(batch(), slow, workers=2, shard_size=1, queue_depth=2, mode="cpu threads",
+                         check_interrupt=check_interrupt)
+    # Only the shards already running when the interrupt came finished
+    assert len(ran) <= 2
@@ -0,0 +1,34 @@
+import { app } from "../../scripts/app.js";
+
+// Nodes that grow a new input whenever their last numbered input gets connected
+const DYNAMIC_INPUTS = {
+    ConfigurableModelRouter: { prefix: "model_", type: "MODEL" },
+    ImageBatchBoolean: { prefix: "image", type: "IMAGE" },
+};
+
+app.registerExtension({
+    name: "FluxContinuum.DynamicInputs",
+    async beforeRegisterNodeDef(nodeType, nodeData, app) {
+        const config = DYNAMIC_INPUTS[nodeData.name];
+        if (!config)
+            return;
+
+        const pattern = new RegExp(`^${config.prefix}\\d+$`);
+        const onConnectionsChange = nodeType.prototype.onConnectionsChange;
+        nodeType.prototype.onConnectionsChange = function (type, index, connected, link_info) {
+            const result = onConnectionsChange?.apply(this, arguments);
+
+            // Only react to input connections
+            if (type !== 1 || !connected)
+                return result;
+
+            const inputs = (this.inputs || []).filter(input => pattern.test(input.name));
+            if (inputs.length === 0 || inputs.some(input => input.link == null))
+                return result;
+
+            const last = Math.max(...inputs.map(input => parseInt(input.name.slice(config.prefix.length))));
+            this.addInput(`${config.prefix}${last + 1}`, config.type);
+            return result;
+        };
+    }
+});
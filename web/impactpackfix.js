@@ -1,7 +1,58 @@
 import { app } from "../../scripts/app.js";
+import { api } from "../../scripts/api.js";
+
+// Mode changes requested by ImpactControlBridgeFix nodes, per prompt id.
+// A prompt's changes are applied together when that prompt ends, followed by a single requeue.
+const BRIDGE_MODES = { actives: 0, mutes: 2, bypasses: 4 };
+const pendingBridgeModes = new Map();
+
+function collectBridgeModes({ detail }) {
+    const promptId = detail.prompt_id ?? null;
+    if (!pendingBridgeModes.has(promptId))
+        pendingBridgeModes.set(promptId, new Map());
+
+    const modes = pendingBridgeModes.get(promptId);
+    for (const [key, mode] of Object.entries(BRIDGE_MODES)) {
+        for (const nodeId of detail[key] || []) {
+            modes.set(String(nodeId), mode);
+        }
+    }
+}
+
+function applyBridgeModes(promptId) {
+    const modes = pendingBridgeModes.get(promptId);
+    pendingBridgeModes.delete(promptId);
+    if (!modes)
+        return;
+
+    let changed = false;
+    for (const [nodeId, mode] of modes) {
+        const node = app.graph.getNodeById(nodeId);
+        if (node && node.mode !== mode) {
+            node.mode = mode;
+            changed = true;
+        }
+    }
+
+    if (changed) {
+        app.graph.setDirtyCanvas(true, true);
+        app.queuePrompt(0, 1);
+    }
+}
 
 app.registerExtension({
     name: "FluxContinuum.ImpactControlBridgeFix",
+    setup() {
+        api.addEventListener("flux-continuum-bridge-resolve", collectBridgeModes);
+        api.addEventListener("execution_success", ({ detail }) => applyBridgeModes(detail?.prompt_id ?? null));
+        // Servers without prompt ids only signal the end of a run with an empty "executing" event
+        api.addEventListener("executing", ({ detail }) => {
+            if (detail === null)
+                applyBridgeModes(null);
+        });
+        api.addEventListener("execution_error", ({ detail }) => pendingBridgeModes.delete(detail?.prompt_id ?? null));
+        api.addEventListener("execution_interrupted", ({ detail }) => pendingBridgeModes.delete(detail?.prompt_id ?? null));
+    },
     async beforeRegisterNodeDef(nodeType, nodeData, app) {
         if(nodeData.name == "ImpactControlBridge") {
             const onConnectionsChange = nodeType.prototype.onConnectionsChange;
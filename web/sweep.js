@@ -0,0 +1,78 @@
+import { app } from "../../scripts/app.js";
+import { api } from "../../scripts/api.js";
+
+// Copy of workflow with one sweep prompt's widget values, so images saved by that prompt reproduce it.
+// Each changed node is re-serialized with its widgets briefly set to the swept values.
+function sweepWorkflow(workflow, inputs) {
+    const changes = new Map();
+    for (const [nodeId, name, value] of inputs) {
+        if (!changes.has(nodeId))
+            changes.set(nodeId, []);
+        changes.get(nodeId).push([name, value]);
+    }
+
+    const copy = structuredClone(workflow);
+    for (const [nodeId, values] of changes) {
+        const node = app.graph.getNodeById(nodeId);
+        const saved = copy.nodes.find(n => String(n.id) === String(nodeId));
+        if (!node || !saved)
+            continue;
+
+        const restore = [];
+        for (const [name, value] of values) {
+            const widget = node.widgets?.find(w => w.name === name);
+            if (widget) {
+                restore.push([widget, widget.value]);
+                widget.value = value;
+            }
+        }
+        try {
+            if (restore.length)
+                saved.widgets_values = structuredClone(node.serialize().widgets_values);
+        } finally {
+            for (const [widget, value] of restore)
+                widget.value = value;
+        }
+    }
+    return copy;
+}
+
+// Expands the ParameterSweep spec on the server and queues the resulting prompts in order
+async function queueSweep(node) {
+    const spec = node.widgets.find(w => w.name === "spec").value;
+    const mode = node.widgets.find(w => w.name === "mode").value;
+    const { output, workflow } = await app.graphToPrompt();
+
+    const response = await api.fetchApi("/flux-continuum/sweep", {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({ prompt: output, spec, mode }),
+    });
+    const data = await response.json();
+    if (!response.ok) {
+        alert(`Parameter Sweep: ${data.error}`);
+        return;
+    }
+
+    // Appended in order: front-queued prompts would run last-in, first-out and break the sweep order
+    for (const { prompt, inputs } of data.prompts) {
+        await api.queuePrompt(0, { output: prompt, workflow: sweepWorkflow(workflow, inputs) });
+    }
+}
+
+app.registerExtension({
+    name: "FluxContinuum.ParameterSweep",
+    async beforeRegisterNodeDef(nodeType, nodeData, app) {
+        if (nodeData.name !== "ParameterSweep")
+            return;
+
+        const onNodeCreated = nodeType.prototype.onNodeCreated;
+        nodeType.prototype.onNodeCreated = function () {
+            const result = onNodeCreated?.apply(this, arguments);
+            this.addWidget("button", "Queue Sweep", null, () => {
+                queueSweep(this).catch(error => console.error("Parameter Sweep failed", error));
+            });
+            return result;
+        };
+    },
+});